@@ -1,15 +1,26 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-import requests
-from bs4 import BeautifulSoup, Tag
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from bs4 import BeautifulSoup
 from pydantic import BaseModel, HttpUrl
-from typing import List, Optional
 import google.generativeai as genai
 import os
 from dotenv import load_dotenv
 import cssutils
+import orjson
 import logging
-import re
+
+from .scraping import (
+    ContentTooLarge,
+    HEADING_TAGS,
+    MAX_PAGE_BYTES,
+    ScrapedPageInfo,
+    cached_scrape,
+    client,
+    extract_all_styles,
+    fetch_limited,
+    preserve_dom_structure_OPTIMIZED,
+)
 
 cssutils.log.setLevel(logging.CRITICAL) 
 logging.basicConfig(level=logging.INFO)
@@ -31,12 +42,12 @@ def configure_gemini_api():
         raise
 
 configure_gemini_api()
-CLONE_WEBSITE_PROMPT = """
-You are an expert web developer who replicates websites with 100% accuracy. Clone this website with all its styles and structure.
+GEMINI_MODEL = 'models/gemini-2.5-flash-preview-05-20'
+FinishReason = genai.protos.Candidate.FinishReason
 
-Original URL: {url}
-CSS Styles Found:{all_styles}  
-DOM Structure: {dom_structure}
+# Static instructions, sent as the model's system instruction
+CLONE_WEBSITE_INSTRUCTIONS = """
+You are an expert web developer who replicates websites with 100% accuracy. Clone the website described by the user with all its styles and structure.
 
 Create a complete HTML document that:
 1. Preserves the DOM structure and hierarchy
@@ -45,10 +56,57 @@ Create a complete HTML document that:
 4. Keeps the same visual appearance
 """
 
+# Per-request details, sent as the user content
+CLONE_WEBSITE_PROMPT = """
+Original URL: {url}
+CSS Styles Found:{all_styles}  
+Inline Styles: {inline_styles}
+DOM Structure: {dom_structure}
+"""
+
+# Upper bounds on each section of the per-request prompt
+MAX_STYLES_CHARS = 99999
+MAX_INLINE_STYLES_BYTES = 20000
+MAX_DOM_BYTES = 150000
+# orjson refuses more than 255 levels of nesting and each DOM level adds two
+# (the node dict and its children list), so deeper nodes are left out
+MAX_DOM_DEPTH = 100
+
+def to_prompt_json(data, max_bytes):
+    """Serialize data as JSON for the prompt, cut to at most max_bytes"""
+    return orjson.dumps(data)[:max_bytes].decode('utf-8', errors='ignore')
+
+def sse_event(event, data):
+    """Encode one server-sent event with a JSON payload"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+async def generate_clone_events(response, metadata):
+    """Turn a streaming Gemini response into metadata, chunk and done/error events"""
+    yield sse_event("metadata", metadata)
+    try:
+        async for chunk in response:
+            if not chunk.candidates:
+                yield sse_event("error", f"Gemini AI blocked the prompt: {chunk.prompt_feedback}")
+                return
+            candidate = chunk.candidates[0]
+            text = ''.join(part.text for part in candidate.content.parts)
+            if text:
+                yield sse_event("chunk", text)
+            # SAFETY, RECITATION, MAX_TOKENS etc. mean the HTML is incomplete
+            if candidate.finish_reason not in (FinishReason.FINISH_REASON_UNSPECIFIED, FinishReason.STOP):
+                yield sse_event("error", f"Gemini AI stopped early: {candidate.finish_reason.name}")
+                return
+    except Exception as gemini_error:
+        logging.error(f"Gemini API error while streaming: {gemini_error}")
+        yield sse_event("error", f"Gemini AI failed: {str(gemini_error)}")
+        return
+    yield sse_event("done", None)
+
 app = FastAPI(
     title="Website Scraper API",
     description="An API to scrape basic information from websites.",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
 )
 
 origins = [
@@ -66,124 +124,9 @@ app.add_middleware(
 class ScrapeRequest(BaseModel):
     url: HttpUrl
 
-class ScrapedPageInfo(BaseModel):
-    requested_url: str
-    title: Optional[str] = None
-    headings_h1: List[str] = []
-    paragraphs: List[str] = []
-    raw_html: Optional[str] = None
-
-def perform_scrape(target_url: str) -> ScrapedPageInfo:
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36 ScraperBot/1.0 (+http://yourdomain.com/botinfo)' # Be a good bot
-        }
-        response = requests.get(target_url, headers=headers, timeout=15) 
-        response.raise_for_status()  
-
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        title = soup.title.string.strip() if soup.title else None
-
-        headings_h1 = [h1.get_text(strip=True) for h1 in soup.find_all('h1')]
-
-        paragraphs = [p.get_text(strip=True) for p in soup.find_all('p')]
-
-        raw_html = str(soup)
-
-        return ScrapedPageInfo(
-            requested_url=target_url,
-            title=title,
-            headings_h1=headings_h1,
-            paragraphs=paragraphs,
-            raw_html=raw_html,
-        )
-
-    except requests.exceptions.Timeout:
-        raise HTTPException(status_code=408, detail=f"Request to {target_url} timed out.")
-    except requests.exceptions.HTTPError as e:
-        raise HTTPException(status_code=e.response.status_code, detail=f"HTTP error fetching {target_url}: {e.response.reason}")
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=503, detail=f"Failed to fetch URL {target_url}: {str(e)}")
-    except Exception as e:
-        # Log the full error for debugging on the server
-        logging.error(f"An unexpected error occurred while scraping {target_url}: {str(e)}")        
-        raise HTTPException(status_code=500, detail=f"An unexpected error occurred during scraping. Please check server logs.")
-
-def compress_css(css_text):
-    if not css_text:
-        return ""
-    css_text = re.sub(r'/\*.*?\*/', '', css_text, flags=re.DOTALL) 
-    css_text = re.sub(r'\s+', ' ', css_text)  
-    css_text = re.sub(r'\s*([{}:;,])\s*', r'\1', css_text)  
-    return css_text.strip()
-
-def extract_all_styles(soup, base_url, max_size=99999):
-    """Extract inline styles, style tags, and linked stylesheets"""
-    all_css = []
-    current_size = 0
-    
-    for style_tag in soup.find_all('style'):
-        if style_tag.string:
-            compressed = compress_css(style_tag.string)
-            if compressed and current_size + len(compressed) <= max_size:
-                all_css.append(compressed)
-                current_size += len(compressed)
-            elif current_size >= max_size:
-                break
-    
-    for link in soup.find_all('link', rel='stylesheet'):
-        href = link.get('href')
-        if href:
-            try:
-                # Handle relative URLs
-                if not href.startswith(('http://', 'https://')):
-                    from urllib.parse import urljoin
-                    href = urljoin(base_url, href)
-                
-                css_response = requests.get(href, timeout=5)
-                if css_response.status_code == 200:
-                    compressed = compress_css(css_response.text)
-                    css_with_comment = f"/* {href[:30]}... */{compressed}"
-                    if current_size + len(css_with_comment) <= max_size:
-                        all_css.append(css_with_comment)
-                        current_size += len(css_with_comment)
-                    else:
-                        break
-            except:
-                pass
-    
-    return '\n'.join(all_css)
-
-def preserve_dom_structure_OPTIMIZED(element, max_depth=999, current_depth=0):
-    if not isinstance(element, Tag):
-        return None
-    
-    skip_tags = {'script', 'style', 'meta', 'link', 'noscript', 'br', 'hr'}
-    if element.name in skip_tags:
-        return None
-    
-    attrs = {}
-    preserve_attrs = ['class', 'id', 'viewBox', 'd', 'fill', 'stroke', 'cx', 'cy', 'r', 'x', 'y', 'width', 'height', 'xmlns', 'transform']
-    for attr in preserve_attrs:
-        if element.get(attr):
-            attrs[attr] = element.get(attr)
-    
-    children = []
-    if current_depth < max_depth - 1:
-        child_count = 0
-        for child in element.children:
-            if isinstance(child, Tag):
-                child_data = preserve_dom_structure_OPTIMIZED(child, max_depth, current_depth + 1)
-                if child_data:
-                    children.append(child_data)
-    
-    return {
-        'tag': element.name,
-        'attrs': attrs,
-        'text': element.get_text(strip=True), 
-        'children': children
-    }
+@app.on_event("shutdown")
+async def close_http_client():
+    await client.aclose()
 
 @app.get(
     "/scrape-website",
@@ -195,61 +138,94 @@ def preserve_dom_structure_OPTIMIZED(element, max_depth=999, current_depth=0):
 async def scrape_website_endpoint(
     url_to_scrape: HttpUrl = Query(..., description="The URL of the website to scrape (must be a valid HTTP/HTTPS URL)")
 ): 
-    scraped_data = perform_scrape(str(url_to_scrape)) 
+    scraped_data = await cached_scrape(str(url_to_scrape)) 
     return scraped_data
 
 @app.post("/clone-website")
 async def clone_website(request: ScrapeRequest):
     try:
-        response = requests.get(request.url, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
+        content, _ = await fetch_limited(str(request.url), MAX_PAGE_BYTES, timeout=10)
         
-        title = soup.find('title').get_text(strip=True) if soup.find('title') else "Untitled"
-        headings = [h.get_text(strip=True) for h in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])]
-        paragraphs = [p.get_text(strip=True) for p in soup.find_all('p') if p.get_text(strip=True)]
-        
-        all_styles = extract_all_styles(soup, str(request.url))
-        body = soup.find('body')
-        dom_structure = preserve_dom_structure_OPTIMIZED(body) if body else None
-
+        soup = BeautifulSoup(content, 'lxml')
+
+        # Gather everything the prompt needs in a single walk over the tree
+        title = None
+        body = None
+        headings = []
+        paragraphs = []
+        style_tags = []
+        stylesheet_hrefs = []
         inline_styles = []
-        for element in soup.find_all(style=True):
-            inline_styles.append({
-                'tag': element.name,
-                'id': element.get('id', ''),
-                'class': ' '.join(element.get('class', [])),
-                'style': element['style']
-            })
-
-        model = genai.GenerativeModel('gemini-2.5-flash-preview-05-20')
+        for element in soup.find_all(True):
+            tag = element.name
+            if tag == 'title':
+                if title is None:
+                    title = element.get_text(strip=True)
+            elif tag == 'body':
+                if body is None:
+                    body = element
+            elif tag in HEADING_TAGS:
+                headings.append(element.get_text(strip=True))
+            elif tag == 'p':
+                text = element.get_text(strip=True)
+                if text:
+                    paragraphs.append(text)
+            elif tag == 'style':
+                style_tags.append(element)
+            elif tag == 'link':
+                if 'stylesheet' in element.get('rel', []) and element.get('href'):
+                    stylesheet_hrefs.append(element['href'])
+
+            if element.get('style') is not None:
+                inline_styles.append({
+                    'tag': tag,
+                    'id': element.get('id', ''),
+                    'class': ' '.join(element.get('class', [])),
+                    'style': element['style']
+                })
+
+        if title is None:
+            title = "Untitled"
+
+        all_styles = await extract_all_styles(style_tags, stylesheet_hrefs, str(request.url), max_size=MAX_STYLES_CHARS)
+        dom_structure = preserve_dom_structure_OPTIMIZED(body, max_depth=MAX_DOM_DEPTH) if body else None
+
+        model = genai.GenerativeModel(GEMINI_MODEL, system_instruction=CLONE_WEBSITE_INSTRUCTIONS)
         
         prompt = CLONE_WEBSITE_PROMPT.format(
             url=str(request.url),
-            all_styles=all_styles,
-            inline_styles=inline_styles,
-            dom_structure=str(dom_structure)
+            all_styles=all_styles[:MAX_STYLES_CHARS],
+            inline_styles=to_prompt_json(inline_styles, MAX_INLINE_STYLES_BYTES),
+            dom_structure=to_prompt_json(dom_structure, MAX_DOM_BYTES)
         )
 
         try:
-            response = model.generate_content(prompt)
-            generated_html = response.text
+            # Resolves once the first chunk arrives, so setup errors still surface as a 500
+            response = await model.generate_content_async(prompt, stream=True)
         except Exception as gemini_error:
             logging.error(f"Gemini API error: {gemini_error}")
             raise HTTPException(status_code=500, detail=f"Gemini AI failed: {str(gemini_error)}")
-        
-        return {
+
+        metadata = {
             "success": True,
-            "original_url": request.url,
-            "generated_html": generated_html,
+            "original_url": str(request.url),
             "original_content": {
                 "title": title,
                 "headings": headings,
                 "paragraphs": paragraphs
             }
         }
+
+        return StreamingResponse(
+            generate_clone_events(response, metadata),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache"}
+        )
         
+    except HTTPException:
+        raise
+    except ContentTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logging.error(f"Error in clone_website endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -259,5 +235,17 @@ def read_root():
     return {"message": "Hello World"}
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        # uvloop is not available on Windows; "auto" falls back to asyncio there
+        loop="auto" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        # Each worker keeps its own scrape cache, so more workers means fewer cache hits
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        log_level="warning",
+        access_log=False
+    )
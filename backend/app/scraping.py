@@ -0,0 +1,251 @@
+import asyncio
+import httpx
+from bs4 import NavigableString, Tag, UnicodeDammit
+from cachetools import TTLCache
+from fastapi import HTTPException
+from pydantic import BaseModel
+from selectolax.lexbor import LexborHTMLParser
+from typing import List, Optional
+from urllib.parse import urljoin
+import logging
+import re
+
+# Shared client so the event loop is never blocked on a remote fetch and
+# keep-alive connections (TCP + TLS) are reused across requests per host
+client = httpx.AsyncClient(
+    timeout=15,
+    headers={
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36 ScraperBot/1.0 (+http://yourdomain.com/botinfo)', # Be a good bot
+        'Accept': 'text/html,application/xhtml+xml,*/*;q=0.8',
+        # httpx decodes these transparently; br needs the brotli package
+        'Accept-Encoding': 'gzip, deflate, br'
+    },
+    follow_redirects=True,
+    transport=httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        retries=1
+    ),
+)
+
+MAX_PAGE_BYTES = 10 * 1024 * 1024
+MAX_STYLESHEET_BYTES = 2 * 1024 * 1024
+
+class ContentTooLarge(Exception):
+    """Raised by fetch_limited when a response body exceeds its byte limit"""
+
+async def fetch_limited(url, max_bytes, timeout=15):
+    """Stream a response body, returning (bytes, declared charset or None)"""
+    async with client.stream('GET', url, timeout=timeout) as response:
+        response.raise_for_status()
+        body = bytearray()
+        async for chunk in response.aiter_bytes(65536):
+            body.extend(chunk)
+            if len(body) > max_bytes:
+                raise ContentTooLarge(f"Content at {url} exceeds the {max_bytes} byte limit.")
+        return bytes(body), response.charset_encoding
+
+def decode_text(content, charset):
+    """Decode a body with its declared charset, falling back to UTF-8 like httpx's .text"""
+    try:
+        return content.decode(charset or 'utf-8', errors='replace')
+    except LookupError:
+        return content.decode('utf-8', errors='replace')
+
+def decode_html(content, charset):
+    """Decode an HTML body, trying the declared charset before sniffing BOMs and <meta charset>"""
+    known = [charset] if charset else []
+    markup = UnicodeDammit(content, known_definite_encodings=known, is_html=True).unicode_markup
+    return markup if markup is not None else decode_text(content, charset)
+
+class ScrapedPageInfo(BaseModel):
+    requested_url: str
+    title: Optional[str] = None
+    headings_h1: List[str] = []
+    paragraphs: List[str] = []
+    raw_html: Optional[str] = None
+
+async def perform_scrape(target_url: str) -> ScrapedPageInfo:
+    try:
+        content, charset = await fetch_limited(target_url, MAX_PAGE_BYTES)
+
+        tree = LexborHTMLParser(decode_html(content, charset))
+
+        title_node = tree.css_first('title')
+        title = title_node.text(strip=True) if title_node else None
+
+        headings_h1 = [h1.text(strip=True) for h1 in tree.css('h1')]
+
+        paragraphs = [p.text(strip=True) for p in tree.css('p')]
+
+        raw_html = tree.html
+
+        return ScrapedPageInfo(
+            requested_url=target_url,
+            title=title,
+            headings_h1=headings_h1,
+            paragraphs=paragraphs,
+            raw_html=raw_html,
+        )
+
+    except ContentTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=408, detail=f"Request to {target_url} timed out.")
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(status_code=e.response.status_code, detail=f"HTTP error fetching {target_url}: {e.response.reason_phrase}")
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=503, detail=f"Failed to fetch URL {target_url}: {str(e)}")
+    except Exception as e:
+        # Log the full error for debugging on the server
+        logging.error(f"An unexpected error occurred while scraping {target_url}: {str(e)}")        
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred during scraping. Please check server logs.")
+
+# Scrape results are cached by normalized URL. The cache is bounded by the
+# amount of text it holds (roughly one character per byte) rather than by
+# entry count, since a single page can carry up to MAX_PAGE_BYTES of raw_html.
+SCRAPE_CACHE_MAX_CHARS = 64 * 1024 * 1024
+MAX_CACHED_PAGE_CHARS = 4 * 1024 * 1024
+
+def scraped_page_size(page):
+    """Approximate size of a cached ScrapedPageInfo, in characters"""
+    return (
+        len(page.raw_html or '')
+        + len(page.title or '')
+        + sum(map(len, page.headings_h1))
+        + sum(map(len, page.paragraphs))
+    )
+
+scrape_cache = TTLCache(maxsize=SCRAPE_CACHE_MAX_CHARS, ttl=300, getsizeof=scraped_page_size)
+
+# One in-flight fetch per URL; concurrent callers await the same task, so
+# its result or exception reaches all of them
+scrape_tasks = {}
+
+async def scrape_and_cache(target_url: str) -> ScrapedPageInfo:
+    page = await perform_scrape(target_url)
+    if scraped_page_size(page) <= MAX_CACHED_PAGE_CHARS:
+        scrape_cache[target_url] = page
+    return page
+
+async def cached_scrape(target_url: str) -> ScrapedPageInfo:
+    cached = scrape_cache.get(target_url)
+    if cached is not None:
+        return cached
+
+    task = scrape_tasks.get(target_url)
+    if task is None:
+        task = asyncio.create_task(scrape_and_cache(target_url))
+        scrape_tasks[target_url] = task
+
+        def forget(finished):
+            if scrape_tasks.get(target_url) is finished:
+                del scrape_tasks[target_url]
+            # Mark a failure as retrieved even if every caller went away
+            if not finished.cancelled():
+                finished.exception()
+
+        task.add_done_callback(forget)
+
+    # Shielded so one disconnecting caller does not cancel the others' fetch
+    return await asyncio.shield(task)
+
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+CSS_WHITESPACE_RE = re.compile(r'\s+')
+CSS_SYMBOL_SPACING_RE = re.compile(r'\s*([{}:;,])\s*')
+
+def compress_css(css_text):
+    if not css_text:
+        return ""
+    css_text = CSS_COMMENT_RE.sub('', css_text) 
+    css_text = CSS_WHITESPACE_RE.sub(' ', css_text)  
+    css_text = CSS_SYMBOL_SPACING_RE.sub(r'\1', css_text)  
+    return css_text.strip()
+
+MAX_STYLESHEET_FETCHES = 8
+
+async def extract_all_styles(style_tags, stylesheet_hrefs, base_url, max_size=99999):
+    """Combine <style> tag contents and linked stylesheets into one CSS string"""
+    all_css = []
+    current_size = 0
+    
+    for style_tag in style_tags:
+        if style_tag.string:
+            compressed = compress_css(style_tag.string)
+            if compressed and current_size + len(compressed) <= max_size:
+                all_css.append(compressed)
+                current_size += len(compressed)
+            elif current_size >= max_size:
+                break
+    
+    hrefs = []
+    for href in stylesheet_hrefs:
+        # Handle relative URLs
+        if not href.startswith(('http://', 'https://')):
+            href = urljoin(base_url, href)
+        if href not in hrefs:
+            hrefs.append(href)
+
+    # Nothing to download if the <style> tags already filled the budget
+    if current_size >= max_size:
+        hrefs = []
+
+    # Fetch stylesheets concurrently, then append in document order so the
+    # max_size cut-off does not depend on which download finished first
+    fetch_slots = asyncio.Semaphore(MAX_STYLESHEET_FETCHES)
+
+    async def fetch_stylesheet(href):
+        async with fetch_slots:
+            return await fetch_limited(href, MAX_STYLESHEET_BYTES, timeout=5)
+
+    css_bodies = await asyncio.gather(
+        *(fetch_stylesheet(href) for href in hrefs),
+        return_exceptions=True
+    )
+    for href, css_body in zip(hrefs, css_bodies):
+        if not isinstance(css_body, Exception):
+            compressed = compress_css(decode_text(*css_body))
+            css_with_comment = f"/* {href[:30]}... */{compressed}"
+            if current_size + len(css_with_comment) <= max_size:
+                all_css.append(css_with_comment)
+                current_size += len(css_with_comment)
+            else:
+                break
+    
+    return '\n'.join(all_css)
+
+HEADING_TAGS = frozenset({'h1', 'h2', 'h3', 'h4', 'h5', 'h6'})
+SKIP_TAGS = frozenset({'script', 'style', 'meta', 'link', 'noscript', 'br', 'hr'})
+PRESERVE_ATTRS = ('class', 'id', 'viewBox', 'd', 'fill', 'stroke', 'cx', 'cy', 'r', 'x', 'y', 'width', 'height', 'xmlns', 'transform')
+
+def preserve_dom_structure_OPTIMIZED(element, max_depth=999, current_depth=0):
+    if not isinstance(element, Tag):
+        return None
+    
+    if element.name in SKIP_TAGS:
+        return None
+    
+    attrs = {}
+    element_attrs = element.attrs
+    for attr in PRESERVE_ATTRS:
+        value = element_attrs.get(attr)
+        if value:
+            attrs[attr] = value
+    
+    children = []
+    if current_depth < max_depth - 1:
+        for child in element.children:
+            if isinstance(child, Tag):
+                child_data = preserve_dom_structure_OPTIMIZED(child, max_depth, current_depth + 1)
+                if child_data:
+                    children.append(child_data)
+    
+    # Only this element's own text; descendants carry theirs in 'children'
+    text = ''.join(child.strip() for child in element.children if type(child) is NavigableString)
+
+    return {
+        'tag': element.name,
+        'attrs': attrs,
+        'text': text, 
+        'children': children
+    }
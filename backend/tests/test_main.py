@@ -0,0 +1,121 @@
+import os
+import types
+import unittest
+from unittest import mock
+
+os.environ.setdefault('GEMINI_API_KEY', 'test-key')
+
+import google.generativeai as genai
+from fastapi.testclient import TestClient
+
+from app import main
+
+
+def fake_chunk(text='', finish_reason=0):
+    candidate = genai.protos.Candidate(
+        content={'parts': [{'text': text}] if text else []},
+        finish_reason=finish_reason
+    )
+    return types.SimpleNamespace(candidates=[candidate], prompt_feedback=None)
+
+
+async def fake_stream(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+class FakeModel:
+    prompts = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def generate_content_async(self, prompt, stream=False):
+        FakeModel.prompts.append(prompt)
+        return fake_stream([fake_chunk('<html></html>', main.FinishReason.STOP)])
+
+
+class CloneWebsiteTests(unittest.TestCase):
+    def setUp(self):
+        FakeModel.prompts = []
+        for target, replacement in [
+            ('fetch_limited', mock.AsyncMock()),
+            ('genai.GenerativeModel', FakeModel),
+        ]:
+            patcher = mock.patch(f'app.main.{target}', replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # No context manager: the shutdown handler would close the shared client
+        self.client = TestClient(main.app)
+
+    def test_deeply_nested_page_is_cloned(self):
+        depth = 140
+        html = '<html><body>' + '<div>' * depth + 'deep' + '</div>' * depth + '</body></html>'
+        main.fetch_limited.return_value = (html.encode(), 'utf-8')
+
+        response = self.client.post('/clone-website', json={'url': 'https://example.com/'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('event: done', response.text)
+        self.assertEqual(len(FakeModel.prompts), 1)
+        self.assertIn('"tag":"div"', FakeModel.prompts[0])
+
+
+class GenerateCloneEventsTests(unittest.IsolatedAsyncioTestCase):
+    metadata = {'success': True}
+
+    async def collect(self, response):
+        return [event async for event in main.generate_clone_events(response, self.metadata)]
+
+    async def test_text_then_stop_ends_with_done(self):
+        events = await self.collect(fake_stream([
+            fake_chunk('<html>'),
+            fake_chunk('</html>', main.FinishReason.STOP),
+        ]))
+
+        self.assertEqual(events, [
+            b'event: metadata\ndata: {"success":true}\n\n',
+            b'event: chunk\ndata: "<html>"\n\n',
+            b'event: chunk\ndata: "</html>"\n\n',
+            b'event: done\ndata: null\n\n',
+        ])
+
+    async def test_safety_stop_ends_with_error_and_no_done(self):
+        events = await self.collect(fake_stream([
+            fake_chunk('<html>'),
+            fake_chunk('', main.FinishReason.SAFETY),
+            fake_chunk('never sent'),
+        ]))
+
+        self.assertEqual(events, [
+            b'event: metadata\ndata: {"success":true}\n\n',
+            b'event: chunk\ndata: "<html>"\n\n',
+            b'event: error\ndata: "Gemini AI stopped early: SAFETY"\n\n',
+        ])
+
+    async def test_blocked_prompt_ends_with_error(self):
+        blocked = types.SimpleNamespace(candidates=[], prompt_feedback='block_reason: SAFETY')
+
+        events = await self.collect(fake_stream([blocked]))
+
+        self.assertEqual(events, [
+            b'event: metadata\ndata: {"success":true}\n\n',
+            b'event: error\ndata: "Gemini AI blocked the prompt: block_reason: SAFETY"\n\n',
+        ])
+
+    async def test_stream_failure_ends_with_error(self):
+        async def failing_stream():
+            yield fake_chunk('<html>')
+            raise RuntimeError('connection reset')
+
+        events = await self.collect(failing_stream())
+
+        self.assertEqual(events, [
+            b'event: metadata\ndata: {"success":true}\n\n',
+            b'event: chunk\ndata: "<html>"\n\n',
+            b'event: error\ndata: "Gemini AI failed: connection reset"\n\n',
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
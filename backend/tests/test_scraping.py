@@ -0,0 +1,158 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+from cachetools import TTLCache
+from fastapi import HTTPException
+
+from app import scraping
+
+
+class CachedScrapeTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.now = 0
+        cache = TTLCache(
+            maxsize=scraping.SCRAPE_CACHE_MAX_CHARS,
+            ttl=300,
+            timer=lambda: self.now,
+            getsizeof=scraping.scraped_page_size
+        )
+        patcher = mock.patch.object(scraping, 'scrape_cache', cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = 0
+
+    def patch_perform_scrape(self, result=None, error=None, raw_html='<html></html>'):
+        async def fake_perform_scrape(target_url):
+            self.calls += 1
+            await asyncio.sleep(0.01)
+            if error:
+                raise error
+            return scraping.ScrapedPageInfo(requested_url=target_url, raw_html=raw_html)
+
+        patcher = mock.patch.object(scraping, 'perform_scrape', fake_perform_scrape)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_repeat_request_is_served_from_cache(self):
+        self.patch_perform_scrape()
+
+        first = await scraping.cached_scrape('https://example.com/')
+        second = await scraping.cached_scrape('https://example.com/')
+
+        self.assertIs(first, second)
+        self.assertEqual(self.calls, 1)
+
+    async def test_entry_expires_after_ttl(self):
+        self.patch_perform_scrape()
+
+        await scraping.cached_scrape('https://example.com/')
+        self.now = 301
+        await scraping.cached_scrape('https://example.com/')
+
+        self.assertEqual(self.calls, 2)
+
+    async def test_concurrent_requests_share_one_fetch(self):
+        self.patch_perform_scrape()
+
+        results = await asyncio.gather(
+            *(scraping.cached_scrape('https://example.com/') for _ in range(10))
+        )
+
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(scraping.scrape_tasks, {})
+
+    async def test_concurrent_requests_share_one_failure(self):
+        self.patch_perform_scrape(error=HTTPException(status_code=408, detail='timed out'))
+
+        results = await asyncio.gather(
+            *(scraping.cached_scrape('https://example.com/') for _ in range(5)),
+            return_exceptions=True
+        )
+
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(isinstance(result, HTTPException) for result in results))
+        self.assertNotIn('https://example.com/', scraping.scrape_cache)
+
+        # A later request tries again rather than replaying the failure
+        with self.assertRaises(HTTPException):
+            await scraping.cached_scrape('https://example.com/')
+        self.assertEqual(self.calls, 2)
+
+    async def test_oversized_page_is_not_cached(self):
+        self.patch_perform_scrape(raw_html='x' * (scraping.MAX_CACHED_PAGE_CHARS + 1))
+
+        await scraping.cached_scrape('https://example.com/')
+
+        self.assertNotIn('https://example.com/', scraping.scrape_cache)
+
+
+class FetchTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # path -> (Content-Type, body)
+        self.routes = {}
+
+        def handler(request):
+            content_type, body = self.routes[request.url.path]
+            return httpx.Response(200, headers={'Content-Type': content_type}, content=body)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True)
+        self.addAsyncCleanup(client.aclose)
+        patcher = mock.patch.object(scraping, 'client', client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_body_over_limit_raises_content_too_large(self):
+        self.routes['/big'] = ('text/html', b'x' * 101)
+
+        with self.assertRaises(scraping.ContentTooLarge):
+            await scraping.fetch_limited('https://example.com/big', max_bytes=100)
+
+    async def test_body_within_limit_returns_content_and_charset(self):
+        self.routes['/page'] = ('text/html; charset=windows-1252', b'ok')
+
+        content, charset = await scraping.fetch_limited('https://example.com/page', max_bytes=100)
+
+        self.assertEqual(content, b'ok')
+        self.assertEqual(charset, 'windows-1252')
+
+    async def test_perform_scrape_maps_oversized_page_to_413(self):
+        self.routes['/big'] = ('text/html', b'x' * (scraping.MAX_PAGE_BYTES + 1))
+
+        with self.assertRaises(HTTPException) as raised:
+            await scraping.perform_scrape('https://example.com/big')
+
+        self.assertEqual(raised.exception.status_code, 413)
+
+    async def test_perform_scrape_decodes_declared_charset(self):
+        html = '<html><title>Café</title><body><h1>Crème brûlée</h1><p>naïve</p></body></html>'
+        self.routes['/page'] = ('text/html; charset=windows-1252', html.encode('cp1252'))
+
+        page = await scraping.perform_scrape('https://example.com/page')
+
+        self.assertEqual(page.title, 'Café')
+        self.assertEqual(page.headings_h1, ['Crème brûlée'])
+        self.assertEqual(page.paragraphs, ['naïve'])
+
+    async def test_perform_scrape_decodes_meta_charset(self):
+        html = "<html><head><meta charset='shift_jis'><title>日本語</title></head></html>"
+        self.routes['/page'] = ('text/html', html.encode('shift_jis'))
+
+        page = await scraping.perform_scrape('https://example.com/page')
+
+        self.assertEqual(page.title, '日本語')
+
+    async def test_oversized_stylesheet_is_skipped(self):
+        self.routes['/big.css'] = ('text/css', b'a{}' * scraping.MAX_STYLESHEET_BYTES)
+        self.routes['/small.css'] = ('text/css; charset=windows-1252', "b::before { content: 'é' }".encode('cp1252'))
+
+        css = await scraping.extract_all_styles([], ['big.css', 'small.css'], 'https://example.com/')
+
+        self.assertNotIn('big.css', css)
+        self.assertIn("b::before{content:'é'}", css)
+
+
+if __name__ == '__main__':
+    unittest.main()
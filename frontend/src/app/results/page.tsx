@@ -8,12 +8,15 @@ export default function ResultsPage() {
   const url = searchParams.get('url');
   const [generatedHtml, setGeneratedHtml] = useState('');
   const [isLoading, setIsLoading] = useState(true);
+  const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
     const fetchGeneratedHtml = async () => {
       if (!url) return;
       
       setIsLoading(true);
+      setGeneratedHtml('');
+      setError(null);
       try {
         const response = await fetch('http://127.0.0.1:8000/clone-website', {
           method: 'POST',
@@ -23,10 +26,54 @@ export default function ResultsPage() {
           body: JSON.stringify({ url }),
         });
         
-        const data = await response.json();
-        setGeneratedHtml(data.generated_html);
-      } catch (error) {
-        console.error('Error fetching generated HTML:', error);
+        if (!response.ok || !response.body) {
+          const errorData = await response.json().catch(() => null);
+          const detail = typeof errorData?.detail === 'string' ? errorData.detail : response.statusText;
+          throw new Error(`Error ${response.status}: ${detail}`);
+        }
+
+        // The backend streams server-sent events: "metadata" first, then
+        // "chunk" events carrying the generated HTML, then "done" or "error"
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let receivedDone = false;
+        let receivedError = false;
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          const events = buffer.split('\n\n');
+          buffer = events.pop() ?? '';
+          for (const rawEvent of events) {
+            let eventName = '';
+            let data = '';
+            for (const line of rawEvent.split('\n')) {
+              if (line.startsWith('event: ')) eventName = line.slice(7);
+              else if (line.startsWith('data: ')) data += line.slice(6);
+            }
+            if (eventName === 'chunk') {
+              const text: string = JSON.parse(data);
+              setGeneratedHtml((previous) => previous + text);
+              setIsLoading(false);
+            } else if (eventName === 'error') {
+              const message: string = JSON.parse(data);
+              console.error('Error generating HTML:', message);
+              setError(message);
+              receivedError = true;
+            } else if (eventName === 'done') {
+              receivedDone = true;
+            }
+          }
+        }
+
+        // A worker restart or proxy timeout closes the stream without either event
+        if (!receivedDone && !receivedError) {
+          setError('The connection closed before the clone finished.');
+        }
+      } catch (err) {
+        console.error('Error fetching generated HTML:', err);
+        setError(err instanceof Error ? err.message : 'An unexpected error occurred. Check the console.');
       } finally {
         setIsLoading(false);
       }
@@ -47,7 +94,13 @@ export default function ResultsPage() {
   }
 
   return (
-  <div className="w-full h-screen overflow-hidden">
+  <div className="w-full h-screen overflow-hidden flex flex-col">
+    {error && (
+      <div style={{ color: 'red', border: '1px solid red', padding: '10px', margin: '10px', borderRadius: '4px' }}>
+        <strong>Error:</strong> {error}
+        {generatedHtml && ' The clone below is incomplete.'}
+      </div>
+    )}
     {isLoading ? (
       <div className="flex items-center justify-center h-full">
         <div className="text-xl">Generating AI Clone...</div>
@@ -55,7 +108,7 @@ export default function ResultsPage() {
     ) : (
       generatedHtml && (
         <div 
-          className="w-full h-full overflow-auto"
+          className="w-full flex-1 overflow-auto"
           dangerouslySetInnerHTML={{ 
             __html: generatedHtml.replace(/```html\n?/g, '').replace(/\n?```/g, '') 
           }}